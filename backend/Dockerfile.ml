@@ -11,7 +11,14 @@ RUN pip install --no-cache-dir -r requirements.txt
 
 # Copy application files
 COPY ml_service.py .
-COPY complex_price_model_v2.pkl .
+COPY batch_jobs.py .
+COPY price_model.py .
+COPY priority_scheduler.py .
+COPY catalog.py .
+COPY market_stats.py .
+COPY sketch.py .
+COPY shadow.py .
+COPY complex_price_model_v2.* ./
 
 # Verify model file exists
 RUN ls -la complex_price_model_v2.pkl || echo "Warning: Model file not found"
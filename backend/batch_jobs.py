@@ -0,0 +1,225 @@
+"""
+Asynchronous bulk-scoring jobs
+Jobs are persisted to a local SQLite file and processed in chunks by a small
+worker pool, so progress survives restarts and clients never hold a
+connection open for the whole run.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+JOB_SUBMITTING = "submitting"  # job row exists, inputs still being stored
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    chunk_size INTEGER NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    input TEXT NOT NULL,
+    result TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+class JobStore:
+    """SQLite-backed storage for job metadata, inputs and per-item results"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps this safe across worker threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create_job(self, total: int, chunk_size: int) -> str:
+        """Insert the job row only; inputs follow in add_items"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, total, chunk_size, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_SUBMITTING, total, chunk_size, now, now)
+            )
+        return job_id
+
+    def add_items(self, job_id: str, items: List[Dict]):
+        """Store job inputs and mark the job queued in one transaction"""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO job_items (job_id, idx, input) VALUES (?, ?, ?)",
+                ((job_id, idx, json.dumps(item)) for idx, item in enumerate(items))
+            )
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (JOB_QUEUED, time.time(), job_id)
+            )
+
+    def fail_interrupted_submissions(self) -> int:
+        """Jobs still submitting at startup lost their inputs with the previous process"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status = ?",
+                (JOB_FAILED, "Server restarted before the job inputs were stored; please resubmit", time.time(), JOB_SUBMITTING)
+            )
+        return cursor.rowcount
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def unfinished_job_ids(self) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def next_chunk(self, job_id: str, chunk_size: int) -> List[sqlite3.Row]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT idx, input FROM job_items WHERE job_id = ? AND result IS NULL ORDER BY idx LIMIT ?",
+                (job_id, chunk_size)
+            ).fetchall()
+
+    def save_chunk(self, job_id: str, results: List[tuple]):
+        """Checkpoint a processed chunk: store (idx, result) pairs and bump progress atomically"""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE job_items SET result = ? WHERE job_id = ? AND idx = ?",
+                ((json.dumps(result, allow_nan=False), job_id, idx) for idx, result in results)
+            )
+            conn.execute(
+                "UPDATE jobs SET processed = processed + ?, updated_at = ? WHERE id = ?",
+                (len(results), time.time(), job_id)
+            )
+
+    def get_results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM job_items WHERE job_id = ? AND idx >= ? AND result IS NOT NULL ORDER BY idx LIMIT ?",
+                (job_id, offset, limit)
+            ).fetchall()
+        return [json.loads(row["result"]) for row in rows]
+
+    def iter_results(self, job_id: str, page_size: int = 1000) -> Iterator[Dict]:
+        offset = 0
+        while True:
+            page = self.get_results(job_id, offset, page_size)
+            if not page:
+                return
+            yield from page
+            offset += len(page)
+
+
+class JobScheduler:
+    """
+    Runs jobs on a bounded thread pool. At most max_concurrent_jobs run at once;
+    the rest wait in the executor queue in submission order.
+    """
+
+    def __init__(self, store: JobStore, process_chunk: Callable[[List[Dict]], List[Dict]],
+                 max_concurrent_jobs: int = 2):
+        self.store = store
+        self.process_chunk = process_chunk
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix="batch-job")
+        self._scheduled = set()
+        self._lock = threading.Lock()
+
+    def resume(self) -> int:
+        """Re-schedule jobs left queued or running by a previous process"""
+        self.store.fail_interrupted_submissions()
+        job_ids = self.store.unfinished_job_ids()
+        for job_id in job_ids:
+            self.schedule(job_id)
+        return len(job_ids)
+
+    def submit(self, items: List[Dict], chunk_size: int) -> str:
+        """Blocking submit: create the job, store its inputs and schedule it"""
+        job_id = self.store.create_job(len(items), chunk_size)
+        self.enqueue(job_id, items)
+        return job_id
+
+    def enqueue(self, job_id: str, items: List[Dict]):
+        """Store inputs for a job created with JobStore.create_job and schedule it"""
+        try:
+            self.store.add_items(job_id, items)
+        except Exception as e:
+            print(f"❌ Storing inputs for batch job {job_id} failed: {e}")
+            self.store.set_status(job_id, JOB_FAILED, str(e))
+            return
+        self.schedule(job_id)
+
+    def schedule(self, job_id: str):
+        with self._lock:
+            if job_id in self._scheduled:
+                return
+            self._scheduled.add(job_id)
+        self.executor.submit(self._run, job_id)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str):
+        try:
+            job = self.store.get_job(job_id)
+            if job is None:
+                return
+            self.store.set_status(job_id, JOB_RUNNING)
+            while True:
+                rows = self.store.next_chunk(job_id, job["chunk_size"])
+                if not rows:
+                    break
+                inputs = [json.loads(row["input"]) for row in rows]
+                # process_chunk reports bad items as per-item results; only infrastructure errors raise here
+                results = self.process_chunk(inputs)
+                if len(results) != len(rows):
+                    raise RuntimeError(f"Chunk returned {len(results)} results for {len(rows)} items")
+                self.store.save_chunk(job_id, [(row["idx"], result) for row, result in zip(rows, results)])
+            self.store.set_status(job_id, JOB_COMPLETED)
+        except Exception as e:
+            print(f"❌ Batch job {job_id} failed: {e}")
+            self.store.set_status(job_id, JOB_FAILED, str(e))
+        finally:
+            with self._lock:
+                self._scheduled.discard(job_id)
+
+
+def default_db_path() -> str:
+    return os.environ.get(
+        "JOBS_DB_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_jobs.sqlite3")
+    )
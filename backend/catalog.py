@@ -0,0 +1,143 @@
+"""
+In-memory property catalog built from data/*.json
+Mirrors the merge, filter and ML-input mapping logic in server.js so Python
+services can search and price listings without a round trip to Node.
+"""
+
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+CATALOG_FILES = ["property_basics.json", "property_characteristics.json", "property_images.json"]
+
+def default_data_dir() -> str:
+    data_dir = os.environ.get(
+        "CATALOG_DATA_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    )
+    # Try alternative path for Docker
+    if not os.path.isdir(data_dir):
+        data_dir = '/app/data'
+    return data_dir
+
+def load_json_file(data_dir: str, filename: str) -> List[Dict]:
+    try:
+        with open(os.path.join(data_dir, filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return []
+
+def merge_property_data(data_dir: str) -> List[Dict]:
+    """Merge basics, characteristics and images by id (same as mergePropertyData in server.js)"""
+    basics, characteristics, images = (load_json_file(data_dir, name) for name in CATALOG_FILES)
+    characteristics_by_id = {c.get("id"): c for c in characteristics}
+    images_by_id = {i.get("id"): i for i in images}
+    return [
+        {**basic, **characteristics_by_id.get(basic.get("id"), {}), **images_by_id.get(basic.get("id"), {})}
+        for basic in basics
+    ]
+
+def property_to_model_input(prop: Dict) -> Dict:
+    """Map a catalog listing to the price model schema (same as mapPropertyToMLInput in server.js)"""
+    title = (prop.get("title") or "").lower()
+    amenities = [a.lower() for a in prop.get("amenities") or []]
+
+    is_condo = any(word in title for word in ["apartment", "condo", "studio", "penthouse"])
+    property_type = "Condo" if is_condo else "SFH"
+    size = prop.get("size_sqft") or 1500  # Default size
+
+    return {
+        "property_type": property_type,
+        "lot_area": size if property_type == "SFH" else 0,
+        "building_area": size if property_type == "Condo" else 0,
+        "bedrooms": prop.get("bedrooms") or 2,
+        "bathrooms": prop.get("bathrooms") or 2,
+        "year_built": prop.get("year_built") or 2010,
+        "has_pool": any("pool" in a or "swimming" in a for a in amenities),
+        "has_garage": any("garage" in a or "parking" in a for a in amenities),
+        "school_rating": prop.get("school_rating") or 8
+    }
+
+def filter_properties(properties: List[Dict], entities: Dict) -> List[Dict]:
+    """Apply chatbot entities (location, budget, bedrooms, bathrooms, property_type) as catalog filters"""
+    location = (entities.get("location") or "").lower()
+    budget = entities.get("budget")
+    bedrooms = entities.get("bedrooms")
+    bathrooms = entities.get("bathrooms")
+    property_type = entities.get("property_type")
+
+    matches = []
+    for prop in properties:
+        if location and location not in (prop.get("location") or "").lower():
+            continue
+        if budget and (prop.get("price") or 0) > budget:
+            continue
+        if bedrooms and (prop.get("bedrooms") or 0) < bedrooms:
+            continue
+        if bathrooms and (prop.get("bathrooms") or 0) < bathrooms:
+            continue
+        if property_type and property_to_model_input(prop)["property_type"] != property_type:
+            continue
+        matches.append(prop)
+    return matches
+
+
+class PropertyCatalog:
+    """
+    Merged catalog held in memory and reloaded when a data file changes on disk.
+    Listeners are called with (changed_listings, removed_ids) after each reload.
+    The new state is only committed once every listener succeeds; otherwise the same
+    diff is replayed on the next reload, so listeners must be idempotent.
+    """
+
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = data_dir or default_data_dir()
+        self.properties: List[Dict] = []
+        self.by_id: Dict[object, Dict] = {}
+        self.listeners: List[Callable[[List[Dict], List], None]] = []
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.reload_if_changed()
+
+    def _current_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for name in CATALOG_FILES:
+            try:
+                mtimes[name] = os.path.getmtime(os.path.join(self.data_dir, name))
+            except OSError:
+                mtimes[name] = 0.0
+        return mtimes
+
+    def add_listener(self, listener: Callable[[List[Dict], List], None]):
+        """Register a change listener and replay the current catalog to it as additions"""
+        with self._lock:
+            self.listeners.append(listener)
+            listener(list(self.properties), [])
+
+    def has_changed(self) -> bool:
+        return self._current_mtimes() != self._mtimes
+
+    def reload_if_changed(self) -> bool:
+        """Reload the catalog if any data file was modified; returns True when reloaded"""
+        mtimes = self._current_mtimes()
+        with self._lock:
+            if mtimes == self._mtimes:
+                return False
+            properties = merge_property_data(self.data_dir)
+            by_id = {prop.get("id"): prop for prop in properties}
+            changed = [prop for prop in properties if self.by_id.get(prop.get("id")) != prop]
+            removed = [listing_id for listing_id in self.by_id if listing_id not in by_id]
+            try:
+                for listener in self.listeners:
+                    listener(changed, removed)
+            except Exception as e:
+                print(f"❌ Catalog listener failed, keeping the previous catalog until the next reload: {e}")
+                return False
+            self.properties, self.by_id, self._mtimes = properties, by_id, mtimes
+        return True
+
+    def all(self) -> List[Dict]:
+        self.reload_if_changed()
+        return self.properties
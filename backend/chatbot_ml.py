@@ -15,6 +15,10 @@ import json
 import re
 import numpy as np
 from typing import Dict, List, Optional
+from catalog import PropertyCatalog, filter_properties, property_to_model_input
+from price_model import load_serving_model, score_properties
+from priority_scheduler import INTERACTIVE, classify_request, scheduler_from_env
+from shadow import ShadowEvaluator, IntentShadowStats
 
 app = FastAPI()
 
@@ -160,6 +164,48 @@ label_encoder = None
 # Conversation memory (simple in-memory store, can be replaced with Redis/DB)
 conversation_memory = {}
 
+# Price model and property catalog used by /assist
+PRICE_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'complex_price_model_v2.pkl')
+
+# Try alternative paths for Docker
+if not os.path.exists(PRICE_MODEL_PATH):
+    PRICE_MODEL_PATH = '/app/complex_price_model_v2.pkl'
+
+# Pickle-free export (see export_price_model.py) takes precedence over the pickle.
+# Without it the legacy .pkl is unpickled here, so it must come from a trusted source.
+PORTABLE_PRICE_MODEL_PATH = os.environ.get(
+    "PORTABLE_MODEL_PATH",
+    os.path.join(os.path.dirname(PRICE_MODEL_PATH), 'complex_price_model_v2.json')
+)
+
+price_model = load_serving_model(PORTABLE_PRICE_MODEL_PATH, PRICE_MODEL_PATH)
+property_catalog = PropertyCatalog()
+MAX_ASSIST_RESULTS = 50
+
+# Model execution goes through priority lanes (live chat vs. bulk replays via X-Priority: bulk)
+model_scheduler = scheduler_from_env("chatbot")
+
+# Optional retrained intent classifier scored in shadow on sampled traffic.
+# Expects a pickled sklearn Pipeline (e.g. TfidfVectorizer + MultinomialNB) that predicts intent labels.
+SHADOW_INTENT_MODEL_PATH = os.environ.get("SHADOW_INTENT_MODEL_PATH")
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+
+shadow_intent_model = None
+if SHADOW_INTENT_MODEL_PATH:
+    try:
+        with open(SHADOW_INTENT_MODEL_PATH, 'rb') as f:
+            shadow_intent_model = pickle.load(f)
+        print(f"✅ Shadow intent model loaded from {SHADOW_INTENT_MODEL_PATH}")
+    except Exception as e:
+        print(f"⚠️  Error loading shadow intent model: {e}")
+
+intent_shadow = ShadowEvaluator(
+    (lambda message: str(shadow_intent_model.predict([message.lower()])[0])) if shadow_intent_model is not None else None,
+    IntentShadowStats(),
+    sample_rate=SHADOW_SAMPLE_RATE,
+    name="intent-shadow"
+)
+
 def train_intent_classifier():
     """Train the intent classification model"""
     global intent_classifier, vectorizer, label_encoder
@@ -458,6 +504,16 @@ async def health():
         "model_loaded": intent_classifier is not None
     }
 
+@app.get("/shadow/stats")
+async def shadow_stats():
+    """Agreement between the serving intent classifier and the shadow candidate on sampled traffic"""
+    return {"success": True, **intent_shadow.snapshot()}
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Queue depth and queue-wait percentiles per priority class"""
+    return {"success": True, **model_scheduler.snapshot()}
+
 @app.post("/analyze")
 async def analyze_message(request: Request):
     """
@@ -485,7 +541,8 @@ async def analyze_message(request: Request):
             print(f"⚠️ Message truncated to 1000 characters")
         
         # Predict intent
-        intent_result = predict_intent(message)
+        intent_result = await model_scheduler.run(classify_request(request, INTERACTIVE), predict_intent, message)
+        intent_shadow.offer(message, intent_result["intent"])
         
         # Extract entities
         entities = extract_entities(message)
@@ -581,7 +638,8 @@ async def classify_intent(request: Request):
         if not message:
             raise HTTPException(status_code=400, detail="Message is required")
         
-        result = predict_intent(message)
+        result = await model_scheduler.run(classify_request(request, INTERACTIVE), predict_intent, message)
+        intent_shadow.offer(message, result["intent"])
         return {
             "success": True,
             "intent": result["intent"],
@@ -609,6 +667,95 @@ async def extract_entities_endpoint(request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Entity extraction error: {str(e)}")
 
+@app.post("/assist")
+async def assist(request: Request):
+    """
+    Single-hop chatbot turn: analyze the message, filter the property catalog
+    with the extracted entities and price the matches in one model call.
+    
+    Expected input format:
+    {
+        "message": str,
+        "conversation_history": [{"role": ..., "content": ...}] (optional),
+        "limit": int (optional, max listings returned)
+    }
+    """
+    if intent_classifier is None:
+        raise HTTPException(status_code=503, detail="ML model not loaded")
+    
+    try:
+        data = await request.json()
+        message = data.get("message", "")
+        conversation_context = data.get("conversation_history", [])
+        limit = data.get("limit", MAX_ASSIST_RESULTS)
+        
+        if not message or not isinstance(message, str):
+            raise HTTPException(status_code=400, detail="Message is required and must be a string")
+        
+        message = message.strip()[:1000]
+        if len(message) < 1:
+            raise HTTPException(status_code=400, detail="Message cannot be empty")
+        if not isinstance(limit, int) or limit < 1:
+            raise HTTPException(status_code=400, detail="limit must be a positive integer")
+        limit = min(limit, MAX_ASSIST_RESULTS)
+        
+        priority = classify_request(request, INTERACTIVE)
+        intent_result = await model_scheduler.run(priority, predict_intent, message)
+        intent_shadow.offer(message, intent_result["intent"])
+        entities = extract_entities(message)
+        
+        # Also fills missing entities in place from the conversation history
+        automated_response = generate_automated_response(
+            intent_result["intent"],
+            entities,
+            intent_result["confidence"],
+            conversation_context
+        )
+        quality_score = calculate_response_quality(intent_result, entities)
+        
+        matches = filter_properties(property_catalog.all(), entities)
+        listings = matches[:limit]
+        
+        # Price all listings with a single vectorized model call
+        predictions_available = price_model is not None and len(listings) > 0
+        if predictions_available:
+            scored = await model_scheduler.run(
+                priority, score_properties, price_model, [property_to_model_input(p) for p in listings]
+            )
+        else:
+            scored = [None] * len(listings)
+        
+        properties = []
+        for listing, result in zip(listings, scored):
+            predicted_price = result["predicted_price"] if result and result["success"] else None
+            price = listing.get("price")
+            properties.append({
+                **listing,
+                "predicted_price": predicted_price,
+                "price_difference": predicted_price - price if predicted_price and price else None,
+                "price_difference_percent": f"{(predicted_price - price) / price * 100:.1f}" if predicted_price and price else None
+            })
+        
+        return {
+            "success": True,
+            "intent": intent_result["intent"],
+            "confidence": intent_result["confidence"],
+            "top_intents": intent_result.get("top_intents", []),
+            "entities": entities,
+            "automated_response": automated_response,
+            "suggested_actions": get_suggested_actions(intent_result["intent"], entities),
+            "quality_score": quality_score,
+            "should_use_ml_response": intent_result["confidence"] > 0.65 and quality_score > 0.6,
+            "properties": properties,
+            "total_matches": len(matches),
+            "predictions_available": predictions_available
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Assist error: {e}")
+        raise HTTPException(status_code=500, detail=f"Assist error: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
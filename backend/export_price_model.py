@@ -0,0 +1,107 @@
+"""
+Export the pickled price model to the pickle-free portable format
+
+The exported model is fitted to the pickled model's predict(dict) outputs on a
+generated corpus and only written if it matches the pickled model on a second,
+held-out corpus within --max-rel-error.
+
+Usage:
+    python export_price_model.py --model-class my_models:ComplexTrapModelRenamed
+    python export_price_model.py --verify complex_price_model_v2.json --model-class my_models:ComplexTrapModelRenamed
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import __main__
+import numpy as np
+from typing import List, Optional
+from price_model import (
+    PortablePriceModel, build_feature_matrix, generate_corpus, load_price_model, to_price
+)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def register_main_class(spec: str):
+    """The legacy pickle references __main__.<Class>; expose the real class under that name"""
+    module_name, class_name = spec.split(":", 1)
+    cls = getattr(importlib.import_module(module_name), class_name)
+    setattr(__main__, class_name, cls)
+
+def reference_prices(model, corpus: list) -> np.ndarray:
+    return np.array([to_price(model.predict(dict(row))) for row in corpus], dtype=np.float64)
+
+def check_parity(reference, candidate: PortablePriceModel, corpus: list) -> dict:
+    """Compare candidate predict(dict) and predict_batch against the reference predict(dict)"""
+    expected = reference_prices(reference, corpus)
+    single = np.array([candidate.predict(row) for row in corpus], dtype=np.float64)
+    batch = np.asarray(candidate.predict_batch(build_feature_matrix(corpus)), dtype=np.float64)
+
+    rel_error = np.abs(batch - expected) / np.maximum(np.abs(expected), 1.0)
+    return {
+        "samples": len(corpus),
+        "max_abs_error": float(np.max(np.abs(batch - expected))),
+        "max_rel_error": float(np.max(rel_error)),
+        "mean_rel_error": float(np.mean(rel_error)),
+        "batch_matches_single": bool(np.allclose(single, batch, rtol=1e-9, atol=1e-6))
+    }
+
+def export(reference, out: Optional[str], degree: int = 2, samples: int = 5000, parity_samples: int = 1000,
+           seed: int = 0, max_rel_error: float = 0.01, verify: Optional[str] = None, source: str = "") -> tuple:
+    """
+    Fit (or load, with verify) a portable model and check parity against reference.
+    Writes out only when parity holds; returns (ok, parity).
+    """
+    parity_corpus = generate_corpus(parity_samples, seed=seed + 1)
+
+    if verify:
+        candidate = PortablePriceModel.load(verify)
+    else:
+        corpus = generate_corpus(samples, seed=seed)
+        candidate = PortablePriceModel.fit(
+            build_feature_matrix(corpus), reference_prices(reference, corpus), degree=degree,
+            metadata={"source": source, "samples": samples, "seed": seed}
+        )
+
+    parity = check_parity(reference, candidate, parity_corpus)
+    print(f"Parity on {parity['samples']} held-out properties: "
+          f"max rel error {parity['max_rel_error']:.6f}, mean rel error {parity['mean_rel_error']:.6f}, "
+          f"max abs error {parity['max_abs_error']:.2f}")
+
+    ok = parity["max_rel_error"] <= max_rel_error and parity["batch_matches_single"]
+    if not ok:
+        print(f"❌ Parity check failed (limit {max_rel_error}); try a higher --degree")
+    elif not verify:
+        candidate.metadata["parity"] = parity
+        candidate.save(out)
+        print(f"✅ Portable model written to {out}")
+    return ok, parity
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export or verify the portable price model")
+    parser.add_argument("--pickle", default=os.path.join(BACKEND_DIR, "complex_price_model_v2.pkl"))
+    parser.add_argument("--out", default=os.path.join(BACKEND_DIR, "complex_price_model_v2.json"))
+    parser.add_argument("--model-class", help="module:Class to expose as __main__.Class before unpickling")
+    parser.add_argument("--verify", metavar="MANIFEST", help="only check an existing export against the pickle")
+    parser.add_argument("--degree", type=int, default=2)
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--parity-samples", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-rel-error", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    if args.model_class:
+        register_main_class(args.model_class)
+    reference = load_price_model(args.pickle)
+    if reference is None:
+        return 1
+
+    ok, _ = export(
+        reference, args.out, degree=args.degree, samples=args.samples, parity_samples=args.parity_samples,
+        seed=args.seed, max_rel_error=args.max_rel_error, verify=args.verify, source=os.path.basename(args.pickle)
+    )
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
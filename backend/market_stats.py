@@ -0,0 +1,186 @@
+"""
+Market-statistics rollups per location and property type
+Aggregates are updated incrementally from catalog changes and each rollup's
+summary is precomputed, so reads are a dictionary lookup.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from sketch import QuantileSketch
+
+ALL = "all"
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+class Rollup:
+    """Running aggregates for one (location, property_type) key"""
+
+    def __init__(self):
+        self.count = 0
+        self.price_sum = 0.0
+        self.prices = QuantileSketch()
+        self.ppsf_count = 0
+        self.ppsf_sum = 0.0
+        self.ppsf = QuantileSketch(min_value=0.01, max_value=1e6)
+        self.gap_count = 0
+        self.gap_sum = 0.0
+        self.gap_pct_sum = 0.0
+
+    def apply(self, contribution: Dict, sign: int):
+        price, ppsf, gap, gap_pct = contribution["price"], contribution["ppsf"], contribution["gap"], contribution["gap_pct"]
+        update = QuantileSketch.add if sign > 0 else QuantileSketch.remove
+        self.count += sign
+        self.price_sum += sign * price
+        update(self.prices, price)
+        if ppsf is not None:
+            self.ppsf_count += sign
+            self.ppsf_sum += sign * ppsf
+            update(self.ppsf, ppsf)
+        if gap is not None:
+            self.gap_count += sign
+            self.gap_sum += sign * gap
+            self.gap_pct_sum += sign * gap_pct
+
+    def summary(self, location: str, property_type: str) -> Dict:
+        percentiles = self.prices.quantiles(QUANTILES)
+        return {
+            "location": location,
+            "property_type": property_type,
+            "count": self.count,
+            "avg_price": self.price_sum / self.count if self.count else None,
+            "price_percentiles": {f"p{int(q * 100)}": value for q, value in zip(QUANTILES, percentiles)},
+            "avg_price_per_sqft": self.ppsf_sum / self.ppsf_count if self.ppsf_count else None,
+            "median_price_per_sqft": self.ppsf.quantiles([0.5])[0],
+            "predicted_count": self.gap_count,
+            "avg_predicted_gap": self.gap_sum / self.gap_count if self.gap_count else None,
+            "avg_predicted_gap_percent": self.gap_pct_sum / self.gap_count if self.gap_count else None
+        }
+
+
+class MarketStats:
+    """
+    Rollups keyed by (location, property_type), including "all" for either part.
+    Both parts of the key are case-insensitive, and a bare city name ("Austin")
+    resolves to its "City, ST" location when only one location has that city.
+    Feed it listing changes with apply_changes (e.g. as a PropertyCatalog listener).
+    """
+
+    def __init__(self, classify: Callable[[Dict], str],
+                 predict: Optional[Callable[[List[Dict]], List[Optional[float]]]] = None):
+        self.classify = classify
+        self.predict = predict
+        self.rollups: Dict[Tuple[str, str], Rollup] = {}
+        self.display_names: Dict[str, str] = {ALL: ALL}
+        self.type_names: Dict[str, str] = {ALL: ALL}
+        self.cities: Dict[str, Dict[str, int]] = {}  # city -> {location key: listing count}
+        self.contributions: Dict[object, Dict] = {}
+        self.snapshots: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def _contribution(self, listing: Dict, predicted: Optional[float]) -> Optional[Dict]:
+        price = listing.get("price")
+        if not isinstance(price, (int, float)) or price <= 0:
+            return None
+        location = (listing.get("location") or "unknown").strip()
+        property_type = self.classify(listing)
+        size = listing.get("size_sqft")
+        location_key, type_key = location.lower(), property_type.lower()
+        return {
+            "location": location,
+            "property_type": property_type,
+            "keys": [(ALL, ALL), (ALL, type_key), (location_key, ALL), (location_key, type_key)],
+            "price": float(price),
+            "ppsf": float(price) / size if isinstance(size, (int, float)) and size > 0 else None,
+            "gap": predicted - price if predicted is not None else None,
+            "gap_pct": (predicted - price) / price * 100 if predicted is not None else None
+        }
+
+    def _predictions(self, changed: List[Dict]) -> List[Optional[float]]:
+        """Predicted prices for changed listings; a listing that cannot be priced gets None"""
+        if not self.predict or not changed:
+            return [None] * len(changed)
+        try:
+            return self.predict(changed)
+        except Exception as e:
+            print(f"⚠️ Market stats batch prediction failed, retrying per listing: {e}")
+        predictions = []
+        for listing in changed:
+            try:
+                predictions.append(self.predict([listing])[0])
+            except Exception:
+                predictions.append(None)
+        return predictions
+
+    def apply_changes(self, changed: List[Dict], removed_ids: List):
+        """
+        Add or replace changed listings and drop removed ones, touching only affected rollups.
+        Idempotent, so a catalog reload can replay the same diff after a failure.
+        """
+        predictions = self._predictions(changed)
+        with self._lock:
+            dirty = set()
+            for listing_id in removed_ids:
+                dirty.update(self._remove(listing_id))
+            for listing, predicted in zip(changed, predictions):
+                listing_id = listing.get("id")
+                dirty.update(self._remove(listing_id))
+                try:
+                    contribution = self._contribution(listing, predicted)
+                except Exception as e:
+                    print(f"⚠️ Skipping listing {listing_id} in market stats: {e}")
+                    continue
+                if contribution is None:
+                    continue
+                self.display_names.setdefault(contribution["location"].lower(), contribution["location"])
+                self.type_names.setdefault(contribution["property_type"].lower(), contribution["property_type"])
+                self._index_city(contribution["location"].lower(), +1)
+                for key in contribution["keys"]:
+                    self.rollups.setdefault(key, Rollup()).apply(contribution, +1)
+                    dirty.add(key)
+                self.contributions[listing_id] = contribution
+            for key in dirty:
+                self._refresh_snapshot(key)
+
+    def _remove(self, listing_id) -> List[Tuple[str, str]]:
+        contribution = self.contributions.pop(listing_id, None)
+        if contribution is None:
+            return []
+        for key in contribution["keys"]:
+            self.rollups[key].apply(contribution, -1)
+        self._index_city(contribution["location"].lower(), -1)
+        return contribution["keys"]
+
+    def _index_city(self, location_key: str, sign: int):
+        city = location_key.split(",")[0].strip()
+        if city == location_key:
+            return
+        locations = self.cities.setdefault(city, {})
+        locations[location_key] = locations.get(location_key, 0) + sign
+        if locations[location_key] <= 0:
+            del locations[location_key]
+        if not locations:
+            del self.cities[city]
+
+    def _refresh_snapshot(self, key: Tuple[str, str]):
+        rollup = self.rollups.get(key)
+        if rollup is None or rollup.count <= 0:
+            self.rollups.pop(key, None)
+            self.snapshots.pop(key, None)
+            return
+        self.snapshots[key] = rollup.summary(self.display_names.get(key[0], key[0]), self.type_names.get(key[1], key[1]))
+
+    def get(self, location: Optional[str] = None, property_type: Optional[str] = None) -> Optional[Dict]:
+        """
+        Precomputed summary for a location ("City, ST" or an unambiguous city name)
+        and property type, both case-insensitive
+        """
+        location_key = (location or ALL).strip().lower()
+        type_key = (property_type or ALL).strip().lower()
+        with self._lock:
+            locations = self.cities.get(location_key)
+            if (location_key, ALL) not in self.snapshots and locations and len(locations) == 1:
+                location_key = next(iter(locations))
+            return self.snapshots.get((location_key, type_key))
+
+    def locations(self) -> List[str]:
+        return sorted(self.display_names[loc] for loc, ptype in self.snapshots if loc != ALL and ptype == ALL)
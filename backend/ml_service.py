@@ -1,7 +1,17 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-import pickle
+from fastapi.responses import StreamingResponse
 import os
+import json
+import itertools
+import numpy as np
+from batch_jobs import JobStore, JobScheduler, JOB_COMPLETED, default_db_path
+from price_model import load_serving_model, load_portable_model, load_price_model, to_price, prepare_model_input, build_feature_matrix, predict_rows, out_of_range_features, score_properties
+from priority_scheduler import INTERACTIVE, BULK, classify_request, scheduler_from_env
+from catalog import PropertyCatalog, property_to_model_input
+from market_stats import MarketStats
+from shadow import ShadowEvaluator, PriceShadowStats
 
 app = FastAPI()
 
@@ -21,18 +31,169 @@ MODEL_PATH = os.path.join(os.path.dirname(__file__), 'complex_price_model_v2.pkl
 if not os.path.exists(MODEL_PATH):
     MODEL_PATH = '/app/complex_price_model_v2.pkl'
 
-try:
-    with open(MODEL_PATH, 'rb') as f:
-        model = pickle.load(f)
-    print(f"✅ ML Model loaded successfully from {MODEL_PATH}")
-except FileNotFoundError:
-    print(f"❌ Model file not found at {MODEL_PATH}")
-    print("⚠️  Continuing without ML model (predictions will not work)")
-    model = None
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    print("⚠️  Continuing without ML model (predictions will not work)")
-    model = None
+# Pickle-free export (see export_price_model.py) takes precedence over the pickle
+PORTABLE_MODEL_PATH = os.environ.get(
+    "PORTABLE_MODEL_PATH",
+    os.path.join(os.path.dirname(MODEL_PATH), 'complex_price_model_v2.json')
+)
+
+model = load_serving_model(PORTABLE_MODEL_PATH, MODEL_PATH)
+
+# Optional candidate model scored in shadow on sampled traffic (.json = portable format, otherwise pickle)
+SHADOW_MODEL_PATH = os.environ.get("SHADOW_MODEL_PATH")
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+
+shadow_model = None
+if SHADOW_MODEL_PATH:
+    shadow_model = load_portable_model(SHADOW_MODEL_PATH) if SHADOW_MODEL_PATH.endswith(".json") else load_price_model(SHADOW_MODEL_PATH)
+
+price_shadow = ShadowEvaluator(
+    (lambda data: to_price(shadow_model.predict(data))) if shadow_model is not None else None,
+    PriceShadowStats(),
+    sample_rate=SHADOW_SAMPLE_RATE,
+    name="price-shadow"
+)
+
+# Features that can be varied by /predict/sweep, with the (min, max) values a sweep may use
+SWEEP_FEATURES = {
+    "year_built": (1800, 2100),
+    "school_rating": (1, 10),
+    "bedrooms": (0, 50),
+    "bathrooms": (0, 50),
+    "lot_area": (0, 10_000_000),
+    "building_area": (0, 1_000_000)
+}
+MAX_SWEEP_POINTS = 2500
+
+# Model execution goes through priority lanes so bulk scoring cannot starve interactive requests
+model_scheduler = scheduler_from_env("ml")
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", "100"))
+
+def score_batch(properties: list) -> list:
+    """Score properties with the currently loaded model"""
+    return score_properties(model, properties)
+
+def predict_prices(rows: list) -> list:
+    """Prices for prepared property dicts with the currently loaded model"""
+    return predict_rows(model, rows).tolist()
+
+def score_job_chunk(properties: list) -> list:
+    """Score a job chunk from a job worker thread, in preemptible bulk slices"""
+    return model_scheduler.run_chunked_sync(BULK, score_batch, properties, BULK_CHUNK_SIZE)
+
+# Asynchronous bulk-scoring jobs (persisted to SQLite, resumed on startup)
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", "2"))
+JOB_CHUNK_SIZE = int(os.environ.get("JOB_CHUNK_SIZE", "500"))
+MAX_JOB_SIZE = int(os.environ.get("MAX_JOB_SIZE", "100000"))
+MAX_RESULTS_PAGE = 1000
+
+job_store = JobStore(default_db_path())
+job_scheduler = JobScheduler(job_store, score_job_chunk, max_concurrent_jobs=MAX_CONCURRENT_JOBS)
+
+@app.on_event("startup")
+async def resume_batch_jobs():
+    if model is None:
+        return
+    resumed = job_scheduler.resume()
+    if resumed:
+        print(f"🔁 Resumed {resumed} unfinished batch job(s)")
+
+@app.on_event("shutdown")
+async def stop_batch_jobs():
+    job_scheduler.shutdown()
+
+# Market statistics per location/property type, updated incrementally from data/*.json changes
+def predict_listings(listings: list) -> list:
+    """Predicted price per catalog listing (None when unavailable)"""
+    if model is None:
+        return [None] * len(listings)
+    # Called from a threadpool thread on reload, so the catalog is scored in preemptible bulk chunks
+    inputs = [property_to_model_input(listing) for listing in listings]
+    results = model_scheduler.run_chunked_sync(BULK, score_batch, inputs, BULK_CHUNK_SIZE)
+    return [result["predicted_price"] if result["success"] else None for result in results]
+
+property_catalog = PropertyCatalog()
+market_stats = MarketStats(lambda listing: property_to_model_input(listing)["property_type"], predict_listings)
+property_catalog.add_listener(market_stats.apply_changes)
+
+def get_job_or_404(job_id: str) -> dict:
+    job = job_store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def format_job(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "total": job["total"],
+        "processed": job["processed"],
+        "progress": job["processed"] / job["total"] if job["total"] else 1.0,
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+def expand_sweep_axis(spec: dict, base: dict) -> tuple:
+    """Turn one sweep range spec into (feature, values array)"""
+    if not isinstance(spec, dict):
+        raise ValueError("each range must be an object")
+    feature = spec.get("feature")
+    if feature not in SWEEP_FEATURES:
+        raise ValueError(f"feature must be one of: {', '.join(SWEEP_FEATURES)}")
+    if feature == "lot_area" and base["property_type"] != "SFH":
+        raise ValueError("lot_area can only be swept for SFH properties")
+    if feature == "building_area" and base["property_type"] != "Condo":
+        raise ValueError("building_area can only be swept for Condo properties")
+    
+    if "values" in spec:
+        values = spec["values"]
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"values for {feature} must be a non-empty array")
+        try:
+            axis = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"values for {feature} must be numbers")
+        if axis.ndim != 1:
+            raise ValueError(f"values for {feature} must be a flat array of numbers")
+    else:
+        for key in ("start", "stop"):
+            if key not in spec:
+                raise ValueError(f"range for {feature} needs 'values' or 'start'/'stop'")
+        try:
+            start, stop = float(spec["start"]), float(spec["stop"])
+            step = float(spec.get("step", 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"start, stop and step for {feature} must be numbers")
+        if not all(np.isfinite([start, stop, step])):
+            raise ValueError(f"start, stop and step for {feature} must be finite numbers")
+        if step <= 0 or stop < start:
+            raise ValueError(f"range for {feature} must have step > 0 and stop >= start")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_SWEEP_POINTS:
+            raise ValueError(f"range for {feature} exceeds {MAX_SWEEP_POINTS} points")
+        axis = start + step * np.arange(count, dtype=np.float64)
+    
+    if not np.all(np.isfinite(axis)):
+        raise ValueError(f"values for {feature} must be finite numbers")
+    low, high = SWEEP_FEATURES[feature]
+    if axis.min() < low or axis.max() > high:
+        raise ValueError(f"{feature} must be between {low} and {high}")
+    if feature != "bathrooms":
+        axis = np.round(axis)
+    if len(np.unique(axis)) != len(axis):
+        raise ValueError(f"values for {feature} must be distinct (after rounding to whole numbers)")
+    return feature, axis
+
+def sweep_rows(base: dict, axes: list) -> list:
+    """One copy of base per grid point (first axis outermost), with only the swept features replaced"""
+    rows = []
+    for point in itertools.product(*[values.tolist() for _, values in axes]):
+        row = dict(base)
+        for (feature, _), value in zip(axes, point):
+            row[feature] = value if feature == "bathrooms" and value % 1 else int(value)
+        rows.append(row)
+    return rows
 
 @app.get("/")
 async def root():
@@ -49,6 +210,16 @@ async def health():
         "model_loaded": model is not None
     }
 
+@app.get("/shadow/stats")
+async def shadow_stats():
+    """Agreement between the serving model and the shadow candidate on sampled traffic"""
+    return {"success": True, **price_shadow.snapshot()}
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Queue depth and queue-wait percentiles per priority class"""
+    return {"success": True, **model_scheduler.snapshot()}
+
 @app.post("/predict")
 async def predict_price(request: Request):
     """
@@ -73,37 +244,25 @@ async def predict_price(request: Request):
     try:
         data = await request.json()
         
-        # Validate required fields
-        required_fields = ["property_type", "bedrooms", "bathrooms", "year_built", "has_pool", "has_garage", "school_rating"]
-        for field in required_fields:
-            if field not in data:
-                raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
-        
-        # Validate property_type
-        if data["property_type"] not in ["SFH", "Condo"]:
-            raise HTTPException(status_code=400, detail="property_type must be 'SFH' or 'Condo'")
-        
-        # Validate area based on property type
-        if data["property_type"] == "SFH":
-            if "lot_area" not in data:
-                raise HTTPException(status_code=400, detail="lot_area required for SFH properties")
-            data["building_area"] = 0  # Not used for SFH
-        else:  # Condo
-            if "building_area" not in data:
-                raise HTTPException(status_code=400, detail="building_area required for Condo properties")
-            data["lot_area"] = 0  # Not used for Condo
-        
-        # Ensure boolean values
-        data["has_pool"] = bool(data["has_pool"])
-        data["has_garage"] = bool(data["has_garage"])
+        # Same validation as batch, sweep and job scoring
+        try:
+            if not isinstance(data, dict):
+                raise ValueError("property must be an object")
+            data = prepare_model_input(data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # Predict
-        prediction = model.predict(data)
+        prediction = await model_scheduler.run(classify_request(request, INTERACTIVE), model.predict, data)
+        predicted_price = to_price(prediction)
+        price_shadow.offer(data, predicted_price)
         
         return {
             "success": True,
-            "predicted_price": float(prediction) if hasattr(prediction, '__float__') else float(prediction[0]) if isinstance(prediction, (list, tuple)) else float(prediction),
-            "input_data": data
+            "predicted_price": predicted_price,
+            "input_data": data,
+            # Portable models clip these to the range they were fitted on
+            "out_of_range_features": out_of_range_features(model, build_feature_matrix([data]))
         }
     except HTTPException:
         raise
@@ -125,48 +284,195 @@ async def predict_price_batch(request: Request):
         if not isinstance(properties, list):
             raise HTTPException(status_code=400, detail="properties must be an array")
         
-        predictions = []
-        for prop in properties:
-            try:
-                # Validate and prepare data (same as single predict)
-                required_fields = ["property_type", "bedrooms", "bathrooms", "year_built", "has_pool", "has_garage", "school_rating"]
-                for field in required_fields:
-                    if field not in prop:
-                        raise ValueError(f"Missing required field: {field}")
-                
-                if prop["property_type"] == "SFH":
-                    if "lot_area" not in prop:
-                        raise ValueError("lot_area required for SFH")
-                    prop["building_area"] = 0
-                else:
-                    if "building_area" not in prop:
-                        raise ValueError("building_area required for Condo")
-                    prop["lot_area"] = 0
-                
-                prop["has_pool"] = bool(prop["has_pool"])
-                prop["has_garage"] = bool(prop["has_garage"])
-                
-                prediction = model.predict(prop)
-                predictions.append({
-                    "success": True,
-                    "predicted_price": float(prediction) if hasattr(prediction, '__float__') else float(prediction[0]) if isinstance(prediction, (list, tuple)) else float(prediction),
-                    "input_data": prop
-                })
-            except Exception as e:
-                predictions.append({
-                    "success": False,
-                    "error": str(e),
-                    "input_data": prop
-                })
+        # Scored in preemptible chunks so interactive requests are served in between
+        predictions = await model_scheduler.run_chunked(
+            classify_request(request, BULK), score_batch, properties, BULK_CHUNK_SIZE
+        )
+        price_shadow.offer_one_of([
+            (prediction["input_data"], prediction["predicted_price"]) for prediction in predictions if prediction["success"]
+        ])
         
         return {
             "success": True,
             "predictions": predictions,
             "count": len(predictions)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch prediction error: {str(e)}")
 
+@app.post("/predict/sweep")
+async def predict_price_sweep(request: Request):
+    """
+    Predict how the price of one property changes over a grid of one or two features.
+    
+    Expected input format:
+    {
+        "base": { ...same fields as /predict... },
+        "ranges": [
+            {"feature": "year_built", "start": 1960, "stop": 2020, "step": 10},
+            {"feature": "school_rating", "values": [4, 6, 8, 10]}
+        ]
+    }
+    
+    The grid is expanded server-side and scored in chunks, one model pass per chunk when the model supports predict_batch.
+    "prices" is a list for one range, or a list of rows (first range x second range) for two.
+    """
+    if model is None:
+        raise HTTPException(status_code=503, detail="ML model not loaded")
+    
+    try:
+        data = await request.json()
+        base = data.get("base")
+        ranges = data.get("ranges")
+        
+        if not isinstance(base, dict):
+            raise HTTPException(status_code=400, detail="base must be an object")
+        if not isinstance(ranges, list) or not 1 <= len(ranges) <= 2:
+            raise HTTPException(status_code=400, detail="ranges must be an array of one or two feature ranges")
+        
+        try:
+            base = prepare_model_input(base)
+            axes = [expand_sweep_axis(spec, base) for spec in ranges]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        features = [feature for feature, _ in axes]
+        if len(set(features)) != len(features):
+            raise HTTPException(status_code=400, detail="each feature can only be swept once")
+        
+        shape = tuple(len(values) for _, values in axes)
+        total_points = int(np.prod(shape))
+        if total_points > MAX_SWEEP_POINTS:
+            raise HTTPException(status_code=400, detail=f"Sweep grid has {total_points} points; maximum is {MAX_SWEEP_POINTS}")
+        
+        # Unswept features keep the base's exact values
+        rows = sweep_rows(base, axes)
+        prices = np.asarray(
+            await model_scheduler.run_chunked(classify_request(request, INTERACTIVE), predict_prices, rows, BULK_CHUNK_SIZE)
+        ).reshape(shape)
+        
+        return {
+            "success": True,
+            "features": features,
+            "axes": {
+                feature: values.tolist() if feature == "bathrooms" else values.astype(int).tolist()
+                for feature, values in axes
+            },
+            "prices": prices.tolist(),
+            "count": total_points,
+            "base": base,
+            "out_of_range_features": out_of_range_features(model, build_feature_matrix(rows))
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sweep prediction error: {str(e)}")
+
+@app.get("/market-stats")
+async def get_market_stats(location: str = None, property_type: str = None):
+    """
+    Precomputed market statistics for a location and/or property type ("SFH" or "Condo").
+    location is "City, ST" or just the city when only one location has that name;
+    both parameters are case-insensitive. Omit both for the whole catalog.
+    """
+    # Data file changes are folded in as chunked bulk work; reads are a dictionary lookup
+    if property_catalog.has_changed():
+        await run_in_threadpool(property_catalog.reload_if_changed)
+    
+    stats = market_stats.get(location, property_type)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No listings for this location/property type")
+    return {"success": True, **stats}
+
+@app.get("/market-stats/locations")
+async def get_market_locations():
+    """Locations that currently have market statistics"""
+    if property_catalog.has_changed():
+        await run_in_threadpool(property_catalog.reload_if_changed)
+    return {"success": True, "locations": market_stats.locations()}
+
+@app.post("/jobs", status_code=202)
+async def submit_batch_job(request: Request, background_tasks: BackgroundTasks):
+    """
+    Submit a large batch for asynchronous scoring.
+    
+    Expected input format:
+    {
+        "properties": [ ...same fields as /predict... ],
+        "chunk_size": int (optional, checkpoint interval)
+    }
+    
+    Returns a job ID immediately (status "submitting" until the inputs are stored);
+    poll /jobs/{job_id} for progress.
+    """
+    if model is None:
+        raise HTTPException(status_code=503, detail="ML model not loaded")
+    
+    try:
+        data = await request.json()
+        properties = data.get("properties", [])
+        
+        if not isinstance(properties, list) or not properties:
+            raise HTTPException(status_code=400, detail="properties must be a non-empty array")
+        if len(properties) > MAX_JOB_SIZE:
+            raise HTTPException(status_code=400, detail=f"A job can contain at most {MAX_JOB_SIZE} properties")
+        
+        chunk_size = data.get("chunk_size", JOB_CHUNK_SIZE)
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise HTTPException(status_code=400, detail="chunk_size must be a positive integer")
+        
+        # Only the job row is written before responding; inputs are stored after the 202 is sent
+        job_id = await run_in_threadpool(job_store.create_job, len(properties), chunk_size)
+        background_tasks.add_task(job_scheduler.enqueue, job_id, properties)
+        job = await run_in_threadpool(job_store.get_job, job_id)
+        return {"success": True, **format_job(job)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job submission error: {str(e)}")
+
+# Job reads are plain def handlers: FastAPI runs them in its threadpool, so a SQLite
+# read waiting on a checkpoint write never blocks the event loop
+@app.get("/jobs/{job_id}")
+def get_batch_job(job_id: str):
+    """Get status and progress of a batch job"""
+    return {"success": True, **format_job(get_job_or_404(job_id))}
+
+@app.get("/jobs/{job_id}/results")
+def get_batch_job_results(job_id: str, offset: int = 0, limit: int = 100):
+    """Fetch one page of results (available as soon as their chunk is checkpointed)"""
+    job = get_job_or_404(job_id)
+    if offset < 0 or not 1 <= limit <= MAX_RESULTS_PAGE:
+        raise HTTPException(status_code=400, detail=f"offset must be >= 0 and limit between 1 and {MAX_RESULTS_PAGE}")
+    
+    results = job_store.get_results(job_id, offset, limit)
+    next_offset = offset + len(results)
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": job["status"],
+        "offset": offset,
+        "count": len(results),
+        "results": results,
+        "next_offset": next_offset if next_offset < job["total"] else None
+    }
+
+@app.get("/jobs/{job_id}/results/stream")
+def stream_batch_job_results(job_id: str):
+    """Stream all results of a completed job as newline-delimited JSON"""
+    job = get_job_or_404(job_id)
+    if job["status"] != JOB_COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}; results can be streamed once it has completed")
+    
+    lines = (json.dumps(result) + "\n" for result in job_store.iter_results(job_id))
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.ndjson"'}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,319 @@
+"""
+Price model interface, loading and input schema helpers
+Shared by ml_service.py and chatbot_ml.py (see model_interface.md for the schema)
+"""
+
+import json
+import os
+import pickle
+from abc import ABC, abstractmethod
+from itertools import combinations_with_replacement
+import numpy as np
+from typing import Dict, List, Optional
+
+# Column order of the numeric feature matrix handed to vectorized models
+FEATURE_COLUMNS = [
+    "is_sfh", "lot_area", "building_area", "bedrooms", "bathrooms",
+    "year_built", "has_pool", "has_garage", "school_rating"
+]
+
+PORTABLE_FORMAT = "price-model-portable"
+PORTABLE_VERSION = 1
+
+
+class PriceModel(ABC):
+    """Interface every price model served by the backend implements"""
+
+    @abstractmethod
+    def predict_batch(self, features: np.ndarray) -> np.ndarray:
+        """Predict prices for an (n, len(FEATURE_COLUMNS)) matrix, returning n floats"""
+
+    def predict(self, data: Dict) -> float:
+        """Predict the price of one property dict (model_interface.md schema)"""
+        return float(self.predict_batch(build_feature_matrix([prepare_model_input(data)]))[0])
+
+
+def polynomial_terms(n_features: int, degree: int) -> List[tuple]:
+    """Index tuples of every monomial up to degree (the empty tuple is the bias term)"""
+    terms = [()]
+    for d in range(1, degree + 1):
+        terms.extend(combinations_with_replacement(range(n_features), d))
+    return terms
+
+def expand_polynomial(standardized: np.ndarray, terms: List[tuple]) -> np.ndarray:
+    """Design matrix with one column per monomial in terms"""
+    design = np.ones((standardized.shape[0], len(terms)), dtype=np.float64)
+    for j, term in enumerate(terms):
+        for i in term:
+            design[:, j] *= standardized[:, i]
+    return design
+
+
+class PortablePriceModel(PriceModel):
+    """
+    Pickle-free price model: a linear model over standardized polynomial features.
+    Stored as a JSON manifest plus a .npy weight vector that is memory-mapped on load.
+    Inputs are clipped to the feature ranges seen during fitting, since the polynomial
+    is not checked against the reference model outside them.
+    """
+
+    def __init__(self, weights: np.ndarray, means: np.ndarray, scales: np.ndarray,
+                 degree: int, metadata: Optional[Dict] = None,
+                 feature_min: Optional[List[float]] = None, feature_max: Optional[List[float]] = None):
+        self.weights = weights
+        self.means = np.asarray(means, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.feature_min = np.asarray(feature_min, dtype=np.float64) if feature_min is not None else None
+        self.feature_max = np.asarray(feature_max, dtype=np.float64) if feature_max is not None else None
+        self.degree = degree
+        self.terms = polynomial_terms(len(FEATURE_COLUMNS), degree)
+        self.metadata = metadata or {}
+        if len(self.weights) != len(self.terms):
+            raise ValueError(f"Expected {len(self.terms)} weights for degree {degree}, got {len(self.weights)}")
+
+    def predict_batch(self, features: np.ndarray) -> np.ndarray:
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+        if self.feature_min is not None:
+            features = np.clip(features, self.feature_min, self.feature_max)
+        design = expand_polynomial((features - self.means) / self.scales, self.terms)
+        return design @ self.weights
+
+    def out_of_range_features(self, features: np.ndarray) -> List[str]:
+        """Names of features with values outside the fitted ranges (these get clipped)"""
+        if self.feature_min is None:
+            return []
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+        outside = ((features < self.feature_min) | (features > self.feature_max)).any(axis=0)
+        return [name for name, flag in zip(FEATURE_COLUMNS, outside) if flag]
+
+    @classmethod
+    def fit(cls, features: np.ndarray, prices: np.ndarray, degree: int = 2, metadata: Optional[Dict] = None):
+        """Least-squares fit to (features, prices), e.g. outputs of another model on a corpus"""
+        means = features.mean(axis=0)
+        scales = features.std(axis=0)
+        scales[scales == 0] = 1.0
+        terms = polynomial_terms(features.shape[1], degree)
+        design = expand_polynomial((features - means) / scales, terms)
+        weights, *_ = np.linalg.lstsq(design, prices, rcond=None)
+        return cls(weights, means, scales, degree, metadata, features.min(axis=0), features.max(axis=0))
+
+    def save(self, manifest_path: str):
+        """Write <name>.json (manifest) and <name>.npy (weights) next to each other"""
+        weights_file = os.path.splitext(os.path.basename(manifest_path))[0] + ".npy"
+        np.save(os.path.join(os.path.dirname(manifest_path) or ".", weights_file), np.asarray(self.weights, dtype=np.float64))
+        manifest = {
+            "format": PORTABLE_FORMAT,
+            "version": PORTABLE_VERSION,
+            "kind": "polynomial_linear",
+            "feature_columns": FEATURE_COLUMNS,
+            "degree": self.degree,
+            "means": self.means.tolist(),
+            "scales": self.scales.tolist(),
+            "feature_min": self.feature_min.tolist() if self.feature_min is not None else None,
+            "feature_max": self.feature_max.tolist() if self.feature_max is not None else None,
+            "weights_file": weights_file,
+            "metadata": self.metadata
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, manifest_path: str):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("format") != PORTABLE_FORMAT or manifest.get("version") != PORTABLE_VERSION:
+            raise ValueError(f"Unsupported model format in {manifest_path}")
+        if manifest.get("feature_columns") != FEATURE_COLUMNS:
+            raise ValueError("Model feature columns do not match FEATURE_COLUMNS")
+        weights_path = os.path.join(os.path.dirname(manifest_path) or ".", manifest["weights_file"])
+        weights = np.load(weights_path, mmap_mode='r')
+        return cls(
+            weights, manifest["means"], manifest["scales"], manifest["degree"], manifest.get("metadata"),
+            manifest.get("feature_min"), manifest.get("feature_max")
+        )
+
+
+def generate_corpus(n: int, seed: int = 0) -> List[Dict]:
+    """Random properties spanning the model_interface.md schema, for export fitting and parity checks"""
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for _ in range(n):
+        is_sfh = bool(rng.random() < 0.5)
+        corpus.append({
+            "property_type": "SFH" if is_sfh else "Condo",
+            "lot_area": int(rng.integers(1000, 20001)) if is_sfh else 0,
+            "building_area": 0 if is_sfh else int(rng.integers(400, 5001)),
+            "bedrooms": int(rng.integers(1, 7)),
+            "bathrooms": int(rng.integers(1, 6)),
+            "year_built": int(rng.integers(1900, 2025)),
+            "has_pool": bool(rng.random() < 0.3),
+            "has_garage": bool(rng.random() < 0.6),
+            "school_rating": int(rng.integers(1, 11))
+        })
+    return corpus
+
+def load_portable_model(path: str) -> Optional[PriceModel]:
+    """Load a portable price model, returning None if it is missing or broken"""
+    try:
+        model = PortablePriceModel.load(path)
+        print(f"✅ Portable ML Model loaded successfully from {path}")
+        return model
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"❌ Error loading portable model: {e}")
+        return None
+
+def load_serving_model(portable_path: str, pickle_path: str):
+    """Prefer the pickle-free model; fall back to unpickling the legacy model"""
+    return load_portable_model(portable_path) or load_price_model(pickle_path)
+
+def load_price_model(path: str):
+    """Load the pickled price model, returning None if it is missing or broken"""
+    try:
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+        print(f"✅ ML Model loaded successfully from {path}")
+        return model
+    except FileNotFoundError:
+        print(f"❌ Model file not found at {path}")
+        print("⚠️  Continuing without ML model (predictions will not work)")
+        return None
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        print("⚠️  Continuing without ML model (predictions will not work)")
+        return None
+
+def prepare_model_input(data: Dict) -> Dict:
+    """Validate a property dict against the model schema and normalize it (raises ValueError)"""
+    required_fields = ["property_type", "bedrooms", "bathrooms", "year_built", "has_pool", "has_garage", "school_rating"]
+    for field in required_fields:
+        if field not in data:
+            raise ValueError(f"Missing required field: {field}")
+
+    if data["property_type"] not in ["SFH", "Condo"]:
+        raise ValueError("property_type must be 'SFH' or 'Condo'")
+
+    prepared = dict(data)
+    if prepared["property_type"] == "SFH":
+        if "lot_area" not in prepared:
+            raise ValueError("lot_area required for SFH properties")
+        prepared["building_area"] = 0  # Not used for SFH
+    else:  # Condo
+        if "building_area" not in prepared:
+            raise ValueError("building_area required for Condo properties")
+        prepared["lot_area"] = 0  # Not used for Condo
+
+    area_field = "lot_area" if prepared["property_type"] == "SFH" else "building_area"
+    for field in [area_field, "bedrooms", "bathrooms", "year_built", "school_rating"]:
+        value = prepared[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+            raise ValueError(f"{field} must be a finite number")
+
+    prepared["has_pool"] = bool(prepared["has_pool"])
+    prepared["has_garage"] = bool(prepared["has_garage"])
+    return prepared
+
+def to_price(prediction) -> float:
+    """Convert a raw model output (scalar, array or list) to a float price"""
+    if isinstance(prediction, (list, tuple, np.ndarray)):
+        return float(np.asarray(prediction).ravel()[0])
+    return float(prediction)
+
+def build_feature_matrix(rows: List[Dict]) -> np.ndarray:
+    """Encode prepared property dicts as a float matrix in FEATURE_COLUMNS order"""
+    matrix = np.empty((len(rows), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        matrix[i] = [
+            1.0 if row["property_type"] == "SFH" else 0.0,
+            row["lot_area"], row["building_area"], row["bedrooms"], row["bathrooms"],
+            row["year_built"], float(row["has_pool"]), float(row["has_garage"]), row["school_rating"]
+        ]
+    return matrix
+
+def _number(value: float):
+    """Whole floats back to int, anything else unchanged (no truncation)"""
+    return int(value) if value.is_integer() else value
+
+def matrix_to_rows(matrix: np.ndarray) -> List[Dict]:
+    """Decode a feature matrix back into model input dicts"""
+    rows = []
+    for values in matrix.tolist():
+        rows.append({
+            "property_type": "SFH" if values[0] >= 0.5 else "Condo",
+            "lot_area": _number(values[1]),
+            "building_area": _number(values[2]),
+            "bedrooms": _number(values[3]),
+            "bathrooms": _number(values[4]),
+            "year_built": _number(values[5]),
+            "has_pool": bool(values[6]),
+            "has_garage": bool(values[7]),
+            "school_rating": _number(values[8])
+        })
+    return rows
+
+def out_of_range_features(model, matrix: np.ndarray) -> List[str]:
+    """Features outside the range a model was fitted on (empty for models without declared ranges)"""
+    if hasattr(model, "out_of_range_features"):
+        return model.out_of_range_features(matrix)
+    return []
+
+def predict_matrix(model, matrix: np.ndarray) -> np.ndarray:
+    """
+    Score a feature matrix in one pass when the model supports predict_batch,
+    otherwise fall back to calling predict() row by row.
+    """
+    if hasattr(model, "predict_batch"):
+        return np.asarray(model.predict_batch(matrix), dtype=np.float64).ravel()
+    return np.array([to_price(model.predict(row)) for row in matrix_to_rows(matrix)], dtype=np.float64)
+
+def predict_rows(model, rows: List[Dict]) -> np.ndarray:
+    """
+    Score prepared property dicts. Models with predict_batch get one matrix pass;
+    other models get predict() on the dicts themselves, so they see exact input values.
+    """
+    if hasattr(model, "predict_batch"):
+        return predict_matrix(model, build_feature_matrix(rows))
+    return np.array([to_price(model.predict(dict(row))) for row in rows], dtype=np.float64)
+
+def json_safe(value):
+    """Copy of a JSON-like value with NaN/Infinity replaced by None, so it can be echoed back as strict JSON"""
+    if isinstance(value, float):
+        return value if np.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [json_safe(item) for item in value]
+    return value
+
+def score_properties(model, properties: List) -> List[Dict]:
+    """
+    Validate and score a list of properties, vectorized when the model supports it.
+    Returns one result per input in the same shape as /predict/batch entries.
+    """
+    results: List[Optional[Dict]] = [None] * len(properties)
+    valid_rows, valid_positions = [], []
+    for i, prop in enumerate(properties):
+        try:
+            if not isinstance(prop, dict):
+                raise ValueError("property must be an object")
+            valid_rows.append(prepare_model_input(prop))
+            valid_positions.append(i)
+        except ValueError as e:
+            results[i] = {"success": False, "error": str(e), "input_data": json_safe(prop)}
+
+    if valid_rows:
+        try:
+            prices = predict_rows(model, valid_rows)
+        except Exception:
+            prices = None
+        for n, (i, row) in enumerate(zip(valid_positions, valid_rows)):
+            try:
+                # If the vectorized pass failed, score row by row so each item keeps its own error
+                price = float(prices[n]) if prices is not None else float(predict_rows(model, [row])[0])
+                if not np.isfinite(price):
+                    raise ValueError("Model returned a non-finite price")
+                results[i] = {"success": True, "predicted_price": price, "input_data": row}
+            except Exception as e:
+                results[i] = {"success": False, "error": str(e), "input_data": row}
+    return results
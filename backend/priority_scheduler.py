@@ -0,0 +1,189 @@
+"""
+Priority lanes for model execution
+Interactive and bulk work share a small worker pool. Classes are picked by
+weighted fair (stride) scheduling, interactive work jumps the line once it has
+waited past its latency budget, and bulk work is submitted in chunks so it can
+be preempted between chunks.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITY_CLASSES = [INTERACTIVE, BULK]
+PRIORITY_HEADER = "x-priority"
+
+def classify_request(request, default: str) -> str:
+    """Priority class for a request: X-Priority header if valid, otherwise the endpoint default"""
+    value = (request.headers.get(PRIORITY_HEADER) or "").strip().lower()
+    return value if value in PRIORITY_CLASSES else default
+
+
+class ClassStats:
+    """Queue-wait statistics for one priority class, kept in a bounded window"""
+
+    def __init__(self, window: int = 1000):
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=window)
+
+    def record(self, wait: float):
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent_waits.append(wait)
+
+    def snapshot(self) -> Dict:
+        recent = sorted(self.recent_waits)
+
+        def percentile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(q * len(recent)))] * 1000
+
+        return {
+            "completed": self.completed,
+            "avg_wait_ms": (self.total_wait / self.completed * 1000) if self.completed else 0.0,
+            "p50_wait_ms": percentile(0.50),
+            "p95_wait_ms": percentile(0.95),
+            "p99_wait_ms": percentile(0.99),
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+
+class PriorityScheduler:
+    """Runs submitted callables on worker threads, choosing the next task by priority class"""
+
+    def __init__(self, workers: int = 1, weights: Optional[Dict[str, int]] = None,
+                 interactive_budget_ms: float = 50.0, name: str = "model"):
+        self.weights = weights or {INTERACTIVE: 4, BULK: 1}
+        self.interactive_budget = interactive_budget_ms / 1000
+        self.queues = {cls: deque() for cls in PRIORITY_CLASSES}
+        self.passes = {cls: 0.0 for cls in PRIORITY_CLASSES}
+        self.stats = {cls: ClassStats() for cls in PRIORITY_CLASSES}
+        self.item_cost = None  # EWMA seconds per item of chunked work, sizes the next chunk
+        self._cond = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"{name}-scheduler-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, priority: str, fn: Callable, *args, **kwargs) -> Future:
+        if priority not in self.queues:
+            raise ValueError(f"Unknown priority class: {priority}")
+        future = Future()
+        with self._cond:
+            queue = self.queues[priority]
+            if not queue:
+                # An idle class must not bank credit while it had nothing to run
+                active = [self.passes[cls] for cls in PRIORITY_CLASSES if self.queues[cls]]
+                if active:
+                    self.passes[priority] = max(self.passes[priority], min(active))
+            queue.append((time.monotonic(), future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+
+    async def run(self, priority: str, fn: Callable, *args, **kwargs):
+        """Await a single task from async request handlers"""
+        return await asyncio.wrap_future(self.submit(priority, fn, *args, **kwargs))
+
+    async def run_chunked(self, priority: str, fn: Callable, items: List, max_chunk_size: int) -> List:
+        """
+        Run fn over items chunk by chunk (fn takes and returns a list). Chunks are
+        queued one at a time, so other classes can be scheduled between them.
+        """
+        results, start = [], 0
+        while start < len(items):
+            chunk = items[start:start + self.chunk_size(max_chunk_size)]
+            results.extend(await self.run(priority, self._timed, fn, chunk))
+            start += len(chunk)
+        return results
+
+    def run_chunked_sync(self, priority: str, fn: Callable, items: List, max_chunk_size: int) -> List:
+        """Blocking variant of run_chunked for use from worker threads"""
+        results, start = [], 0
+        while start < len(items):
+            chunk = items[start:start + self.chunk_size(max_chunk_size)]
+            results.extend(self.submit(priority, self._timed, fn, chunk).result())
+            start += len(chunk)
+        return results
+
+    def chunk_size(self, max_chunk_size: int) -> int:
+        """Largest chunk expected to finish within the interactive latency budget"""
+        if not self.item_cost:
+            return max_chunk_size
+        return max(1, min(max_chunk_size, int(self.interactive_budget / self.item_cost)))
+
+    def _timed(self, fn: Callable, chunk: List) -> List:
+        started = time.perf_counter()
+        result = fn(chunk)
+        cost = (time.perf_counter() - started) / max(len(chunk), 1)
+        self.item_cost = cost if self.item_cost is None else 0.8 * self.item_cost + 0.2 * cost
+        return result
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "weights": dict(self.weights),
+                "interactive_budget_ms": self.interactive_budget * 1000,
+                "workers": len(self._workers),
+                "chunk_item_cost_ms": self.item_cost * 1000 if self.item_cost else None,
+                "classes": {
+                    cls: {
+                        "queued": len(self.queues[cls]),
+                        "oldest_wait_ms": (now - self.queues[cls][0][0]) * 1000 if self.queues[cls] else 0.0,
+                        **self.stats[cls].snapshot()
+                    }
+                    for cls in PRIORITY_CLASSES
+                }
+            }
+
+    def _pick(self) -> Optional[str]:
+        # Interactive work past its latency budget always goes next
+        interactive = self.queues[INTERACTIVE]
+        if interactive and time.monotonic() - interactive[0][0] >= self.interactive_budget:
+            return INTERACTIVE
+        ready = [cls for cls in PRIORITY_CLASSES if self.queues[cls]]
+        if not ready:
+            return None
+        return min(ready, key=lambda cls: (self.passes[cls], PRIORITY_CLASSES.index(cls)))
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                cls = self._pick()
+                while cls is None:
+                    self._cond.wait()
+                    cls = self._pick()
+                enqueued_at, future, fn, args, kwargs = self.queues[cls].popleft()
+                self.passes[cls] += 1.0 / self.weights[cls]
+                self.stats[cls].record(time.monotonic() - enqueued_at)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+def scheduler_from_env(name: str) -> PriorityScheduler:
+    return PriorityScheduler(
+        workers=int(os.environ.get("SCHEDULER_WORKERS", "1")),
+        weights={
+            INTERACTIVE: int(os.environ.get("SCHEDULER_INTERACTIVE_WEIGHT", "4")),
+            BULK: int(os.environ.get("SCHEDULER_BULK_WEIGHT", "1"))
+        },
+        interactive_budget_ms=float(os.environ.get("SCHEDULER_INTERACTIVE_BUDGET_MS", "50")),
+        name=name
+    )
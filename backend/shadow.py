@@ -0,0 +1,153 @@
+"""
+Shadow-model evaluation
+A sample of live requests is replayed against a candidate model on a background
+thread. The request path only does a random draw and a non-blocking enqueue, and
+comparison statistics are kept in fixed-size structures.
+"""
+
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sketch import QuantileSketch
+
+
+class PriceShadowStats:
+    """Agreement between primary and candidate price predictions"""
+
+    def __init__(self):
+        self.compared = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.abs_pct_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.abs_pct = QuantileSketch(min_value=1e-6, max_value=1e6)
+
+    def record(self, primary: float, candidate: float):
+        delta = candidate - primary
+        abs_pct = abs(delta) / max(abs(primary), 1.0) * 100
+        self.compared += 1
+        self.delta_sum += delta
+        self.abs_delta_sum += abs(delta)
+        self.abs_pct_sum += abs_pct
+        self.max_abs_delta = max(self.max_abs_delta, abs(delta))
+        self.abs_pct.add(abs_pct)
+
+    def snapshot(self) -> Dict:
+        p50, p90, p99 = self.abs_pct.quantiles([0.5, 0.9, 0.99])
+        n = self.compared
+        return {
+            "compared": n,
+            "mean_delta": self.delta_sum / n if n else None,
+            "mean_abs_delta": self.abs_delta_sum / n if n else None,
+            "max_abs_delta": self.max_abs_delta if n else None,
+            "mean_abs_percent_error": self.abs_pct_sum / n if n else None,
+            "abs_percent_error_percentiles": {"p50": p50, "p90": p90, "p99": p99}
+        }
+
+
+class IntentShadowStats:
+    """Disagreement between primary and candidate intent labels"""
+
+    def __init__(self):
+        self.compared = 0
+        self.disagreements = 0
+        self.confusions: Dict[str, int] = {}  # "primary->candidate", bounded by the label set
+
+    def record(self, primary: str, candidate: str):
+        self.compared += 1
+        if primary != candidate:
+            self.disagreements += 1
+            pair = f"{primary}->{candidate}"
+            self.confusions[pair] = self.confusions.get(pair, 0) + 1
+
+    def snapshot(self) -> Dict:
+        top = sorted(self.confusions.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "compared": self.compared,
+            "disagreements": self.disagreements,
+            "disagreement_rate": self.disagreements / self.compared if self.compared else None,
+            "top_confusions": [{"pair": pair, "count": count} for pair, count in top]
+        }
+
+
+class ShadowEvaluator:
+    """
+    Scores sampled requests with a candidate model off the request path.
+    score_candidate(payload) returns the candidate's answer; stats.record(primary, candidate)
+    aggregates the comparison.
+    """
+
+    def __init__(self, score_candidate: Optional[Callable[[Any], Any]], stats,
+                 sample_rate: float = 0.1, max_queue: int = 1000, name: str = "shadow"):
+        self.score_candidate = score_candidate
+        self.stats = stats
+        self.sample_rate = sample_rate
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.offered = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.candidate_time = 0.0
+        self._lock = threading.Lock()
+        if self.enabled:
+            threading.Thread(target=self._worker, name=f"{name}-worker", daemon=True).start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.score_candidate is not None and self.sample_rate > 0
+
+    def offer(self, payload: Any, primary: Any):
+        """Called on the request path: sample and enqueue without blocking"""
+        if not self.enabled:
+            return
+        self.offered += 1
+        if random.random() >= self.sample_rate:
+            return
+        try:
+            self.queue.put_nowait((payload, primary))
+            self.sampled += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def offer_one_of(self, items: List[Tuple[Any, Any]]):
+        """
+        Called once per batch request with its (payload, primary) pairs. The request is
+        sampled like a single one, so large batches cannot crowd out interactive samples.
+        """
+        if items:
+            self.offer(*random.choice(items))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = self.stats.snapshot()
+            scored = stats["compared"] + self.errors
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "offered": self.offered,
+                "sampled": self.sampled,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "queued": self.queue.qsize(),
+                "avg_candidate_ms": self.candidate_time / scored * 1000 if scored else None,
+                **stats
+            }
+
+    def _worker(self):
+        while True:
+            payload, primary = self.queue.get()
+            started = time.perf_counter()
+            try:
+                candidate = self.score_candidate(payload)
+                with self._lock:
+                    self.stats.record(primary, candidate)
+            except Exception as e:
+                print(f"⚠️ Shadow scoring error: {e}")
+                with self._lock:
+                    self.errors += 1
+            finally:
+                with self._lock:
+                    self.candidate_time += time.perf_counter() - started
+                self.queue.task_done()
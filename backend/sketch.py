@@ -0,0 +1,69 @@
+"""
+Bounded-memory quantile sketch
+Shared by the market-statistics rollups and the shadow-model comparison stats.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch-style). Quantiles are accurate to
+    within relative_accuracy, memory is bounded by the value range, and values
+    can be removed as well as added. Values <= 0 are counted in a separate zero
+    bucket and reported as exactly 0.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1.0, max_value: float = 1e12):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.max_value = max_value
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        value = min(max(value, self.min_value), self.max_value)
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        i = self._index(value)
+        self.bins[i] = self.bins.get(i, 0) + 1
+
+    def remove(self, value: float):
+        if value <= 0:
+            self.zero_count = max(self.zero_count - 1, 0)
+            self.count = max(self.count - 1, 0)
+            return
+        i = self._index(value)
+        remaining = self.bins.get(i, 0) - 1
+        if remaining > 0:
+            self.bins[i] = remaining
+        else:
+            self.bins.pop(i, None)
+        self.count = max(self.count - 1, 0)
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        if self.count == 0:
+            return [None] * len(qs)
+        ranks = [math.floor(q * (self.count - 1) + 0.5) for q in qs]
+        results: List[Optional[float]] = [None] * len(qs)
+        order = sorted(range(len(qs)), key=lambda k: ranks[k])
+        seen, k = self.zero_count, 0
+        while k < len(order) and ranks[order[k]] < seen:
+            results[order[k]] = 0.0
+            k += 1
+        for i in sorted(self.bins):
+            seen += self.bins[i]
+            while k < len(order) and ranks[order[k]] < seen:
+                results[order[k]] = 2 * self.gamma ** i / (self.gamma + 1)
+                k += 1
+            if k == len(order):
+                break
+        return results
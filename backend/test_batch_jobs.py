@@ -0,0 +1,41 @@
+"""Tests for batch_jobs.py (run from backend/: python -m pytest -q)"""
+
+import time
+from batch_jobs import JobStore, JobScheduler, JOB_COMPLETED, JOB_FAILED
+from price_model import score_properties
+from test_price_model import BASE, LinearModel
+
+
+def wait_for(store, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get_job(job_id)
+        if job["status"] in (JOB_COMPLETED, JOB_FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_bad_rows_are_item_results_not_job_failures(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    scheduler = JobScheduler(store, lambda chunk: score_properties(LinearModel(), chunk))
+    items = [dict(BASE, year_built=1990 + i) for i in range(16)]
+    items[9] = dict(BASE, bedrooms="three")
+    items[12] = dict(BASE, school_rating=None)
+    items[14] = dict(BASE, bedrooms=float("nan"))
+
+    job = wait_for(store, scheduler.submit(items, chunk_size=4))
+    results = list(store.iter_results(job["id"]))
+
+    assert job["status"] == JOB_COMPLETED and job["processed"] == 16
+    assert [i for i, r in enumerate(results) if not r["success"]] == [9, 12, 14]
+    assert results[14]["input_data"]["bedrooms"] is None
+
+
+def test_interrupted_submission_is_failed_on_resume(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = store.create_job(3, chunk_size=2)  # process "died" before add_items
+
+    JobScheduler(store, lambda chunk: chunk).resume()
+
+    assert store.get_job(job_id)["status"] == JOB_FAILED
@@ -0,0 +1,110 @@
+"""
+Parity tests for catalog.py against server.js (run from backend/: python -m pytest -q)
+The JS functions are cut out of server.js and run with node on the shipped data/*.json.
+"""
+
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import pytest
+from catalog import filter_properties, merge_property_data, property_to_model_input
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BACKEND_DIR, "..", "data")
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is required to run server.js functions")
+
+EXTRA_LISTINGS = [
+    {"id": "studio", "title": "Sunny Studio", "location": "Austin, TX", "price": 1, "amenities": ["Parking"]},
+    {"id": "penthouse", "title": "PENTHOUSE Suite", "location": "Austin, TX", "price": 1, "size_sqft": 900,
+     "amenities": ["Swimming area"]},
+    {"id": "house", "title": "Family Home", "location": "Austin, TX", "price": 1, "amenities": [],
+     "bedrooms": 0, "year_built": 1999, "school_rating": 6},
+    {"id": "untitled", "location": "Austin, TX", "price": 1}
+]
+
+
+def js_function(source: str, name: str) -> str:
+    """Source of `const name = (...) => { ... };` in server.js"""
+    start = source.index(f"const {name} = ")
+    depth, i = 0, source.index("{", source.index("=>", start))
+    while True:
+        depth += {"{": 1, "}": -1}.get(source[i], 0)
+        i += 1
+        if depth == 0:
+            return source[start:i] + ";"
+
+
+def run_js(body: str, payload):
+    with open(os.path.join(BACKEND_DIR, "server.js"), encoding="utf-8") as f:
+        source = f.read()
+    script = "\n".join([
+        "const fs = require('fs');",
+        "const { join } = require('path');",
+        f"const __dirname = {json.dumps(BACKEND_DIR)};",
+        *(js_function(source, name) for name in ["loadJSONFile", "mergePropertyData", "filterProperties", "mapPropertyToMLInput"]),
+        "const input = JSON.parse(fs.readFileSync(0, 'utf8'));",
+        body
+    ])
+    output = subprocess.run(["node", "-e", script], input=json.dumps(payload), capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def test_merge_matches_server_js():
+    assert merge_property_data(DATA_DIR) == run_js("console.log(JSON.stringify(mergePropertyData()));", None)
+
+
+def test_model_input_mapping_matches_server_js():
+    listings = merge_property_data(DATA_DIR) + EXTRA_LISTINGS
+    expected = run_js("console.log(JSON.stringify(input.map(mapPropertyToMLInput)));", listings)
+
+    assert [property_to_model_input(listing) for listing in listings] == expected
+    assert [row["property_type"] for row in expected[-4:]] == ["Condo", "Condo", "SFH", "SFH"]
+
+
+def test_filters_match_server_js():
+    cases = [
+        {"location": location, "budget": budget, "bedrooms": bedrooms, "bathrooms": bathrooms, "property_type": property_type}
+        for location, budget, bedrooms, bathrooms, property_type in itertools.product(
+            [None, "austin", "New York", "tx", "nowhere"], [None, 500000, 1000000], [None, 1, 3], [None, 2],
+            [None, "SFH", "Condo"]
+        )
+    ]
+    # filterProperties has no property type filter; the chatbot applies mapPropertyToMLInput's classification
+    expected = run_js("""
+        const properties = mergePropertyData();
+        console.log(JSON.stringify(input.map(e => filterProperties(properties, {
+            location: e.location, maxBudget: e.budget, bedrooms: e.bedrooms, bathrooms: e.bathrooms
+        }).filter(p => !e.property_type || mapPropertyToMLInput(p).property_type === e.property_type)
+          .map(p => p.id))));
+    """, cases)
+
+    properties = merge_property_data(DATA_DIR)
+    actual = [[prop["id"] for prop in filter_properties(properties, entities)] for entities in cases]
+    assert actual == expected
+    assert any(ids and len(ids) < len(properties) for ids in actual)
+
+
+def test_assist_fills_entities_from_history_before_filtering(monkeypatch):
+    pytest.importorskip("httpx")  # required by the FastAPI TestClient
+    from fastapi.testclient import TestClient
+    import chatbot_ml
+    from test_price_model import LinearModel
+
+    monkeypatch.setattr(chatbot_ml, "price_model", LinearModel())
+    history = [{"role": "user", "content": "I'm looking in Dallas with 3 bedrooms"}]
+    body = TestClient(chatbot_ml.app).post("/assist", json={
+        "message": "show me houses under $900k", "conversation_history": history
+    }).json()
+
+    entities = {"location": "Dallas", "budget": 900000, "bedrooms": 3, "bathrooms": None, "property_type": "SFH"}
+    assert {key: body["entities"][key] for key in entities} == entities
+    expected = run_js("""
+        console.log(JSON.stringify(filterProperties(mergePropertyData(), input)
+          .filter(p => mapPropertyToMLInput(p).property_type === 'SFH').map(p => p.id)));
+    """, {"location": "Dallas", "maxBudget": 900000, "bedrooms": 3})
+    assert [prop["id"] for prop in body["properties"]] == expected
+    assert expected == [8]
+    assert body["properties"][0]["predicted_price"] is not None
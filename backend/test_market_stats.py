@@ -0,0 +1,86 @@
+"""Tests for catalog.py and market_stats.py (run from backend/: python -m pytest -q)"""
+
+import json
+import os
+from catalog import PropertyCatalog, property_to_model_input
+from market_stats import MarketStats
+
+
+def write_catalog(data_dir, listings, mtime):
+    for name, rows in [
+        ("property_basics.json", listings),
+        ("property_characteristics.json", []),
+        ("property_images.json", [])
+    ]:
+        path = os.path.join(data_dir, name)
+        with open(path, "w") as f:
+            json.dump(rows, f)
+        os.utime(path, (mtime, mtime))
+
+
+def listing(listing_id, price, location="Austin"):
+    return {"id": listing_id, "title": "House", "location": location, "price": price, "size_sqft": 1000}
+
+
+def classify(prop):
+    return property_to_model_input(prop)["property_type"]
+
+
+def test_failed_prediction_only_drops_that_listings_gap():
+    def predict(listings):
+        if any(l["id"] == 2 for l in listings):
+            raise RuntimeError("model blew up")
+        return [l["price"] * 1.1 for l in listings]
+
+    stats = MarketStats(classify, predict)
+    stats.apply_changes([listing(1, 100000), listing(2, 200000)], [])
+
+    summary = stats.get()
+    assert summary["count"] == 2
+    assert summary["predicted_count"] == 1
+
+
+def test_listener_failure_keeps_the_diff_for_the_next_reload(tmp_path):
+    write_catalog(tmp_path, [listing(1, 100000)], mtime=1000)
+    catalog = PropertyCatalog(str(tmp_path))
+    stats = MarketStats(classify)
+    catalog.add_listener(stats.apply_changes)
+
+    calls = {"n": 0}
+
+    def flaky(changed, removed):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("listener blew up")
+    catalog.listeners.append(flaky)
+
+    write_catalog(tmp_path, [listing(1, 100000), listing(2, 300000)], mtime=2000)
+    assert not catalog.reload_if_changed()
+    assert catalog.has_changed()
+    assert [p["id"] for p in catalog.properties] == [1]
+
+    assert catalog.reload_if_changed()
+    assert not catalog.has_changed()
+    assert stats.get()["count"] == 2
+    assert stats.get()["avg_price"] == 200000
+
+
+def test_lookup_by_city_and_any_case_property_type():
+    stats = MarketStats(classify)
+    stats.apply_changes([
+        listing(1, 100000, "Austin, TX"),
+        dict(listing(2, 300000, "Austin, TX"), title="Downtown Condo"),
+        listing(3, 200000, "Portland, OR"),
+        listing(4, 400000, "Portland, ME")
+    ], [])
+
+    assert stats.get("Austin")["location"] == "Austin, TX"
+    assert stats.get("austin, tx")["count"] == 2
+    assert stats.get("Austin", "condo")["property_type"] == "Condo"
+    assert stats.get(property_type="sfh")["count"] == 3
+    assert stats.get("Portland") is None  # ambiguous; pass "City, ST"
+    assert stats.get("Portland, ME")["count"] == 1
+    assert stats.locations() == ["Austin, TX", "Portland, ME", "Portland, OR"]
+
+    stats.apply_changes([], [4])
+    assert stats.get("Portland")["location"] == "Portland, OR"
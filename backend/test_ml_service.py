@@ -0,0 +1,85 @@
+"""Tests for ml_service.py endpoints (run from backend/: python -m pytest -q)"""
+
+import os
+import tempfile
+import pytest
+
+pytest.importorskip("httpx")  # required by the FastAPI TestClient
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(tempfile.mkdtemp(), "ml_jobs.sqlite3"))
+
+from fastapi.testclient import TestClient
+import ml_service
+from test_batch_jobs import wait_for
+from test_price_model import BASE, LinearModel
+
+client = TestClient(ml_service.app)
+
+
+@pytest.fixture(autouse=True)
+def linear_model(monkeypatch):
+    monkeypatch.setattr(ml_service, "model", LinearModel())
+
+
+def sweep(*ranges, base=BASE):
+    return client.post("/predict/sweep", json={"base": base, "ranges": list(ranges)})
+
+
+def test_sweep_one_range_keeps_exact_base_values():
+    base = dict(BASE, lot_area=5000.7)
+    response = sweep({"feature": "year_built", "start": 1960, "stop": 2020, "step": 30}, base=base)
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["axes"] == {"year_built": [1960, 1990, 2020]}
+    expected = [LinearModel().predict(dict(base, building_area=0, year_built=year)) for year in [1960, 1990, 2020]]
+    assert body["prices"] == pytest.approx(expected)
+
+
+def test_sweep_two_ranges_is_first_by_second():
+    body = sweep(
+        {"feature": "bedrooms", "values": [2, 3]},
+        {"feature": "bathrooms", "values": [1, 1.5, 2]}
+    ).json()
+
+    assert body["count"] == 6
+    assert len(body["prices"]) == 2 and len(body["prices"][0]) == 3
+    assert body["prices"][1][2] == pytest.approx(LinearModel().predict(dict(BASE, bedrooms=3, bathrooms=2)))
+
+
+def test_sweep_grid_cap():
+    response = sweep(
+        {"feature": "lot_area", "start": 1000, "stop": 10000, "step": 100},
+        {"feature": "year_built", "start": 1900, "stop": 2020}
+    )
+    assert response.status_code == 400
+    assert "maximum" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("spec", [
+    {"feature": "bedrooms", "values": [1e300]},
+    {"feature": "school_rating", "values": [0, 5]},
+    {"feature": "year_built", "start": None, "stop": 2000},
+    {"feature": "year_built", "start": "x", "stop": 2000},
+    {"feature": "bedrooms", "values": [[1, 2], [3, 4]]},
+    {"feature": "bedrooms", "values": ["three"]},
+    {"feature": "year_built", "start": 2000, "stop": 2001, "step": 0.5},
+    {"feature": "building_area", "values": [500]},
+    {"feature": "price", "values": [1]},
+    "year_built"
+])
+def test_sweep_rejects_bad_specs(spec):
+    assert sweep(spec).status_code == 400
+
+
+def test_job_results_round_trip():
+    response = client.post("/jobs", json={"properties": [BASE, dict(BASE, bedrooms="three")], "chunk_size": 1})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    status = wait_for(ml_service.job_store, job_id)
+    page = client.get(f"/jobs/{job_id}/results").json()
+    stream = client.get(f"/jobs/{job_id}/results/stream")
+
+    assert status["status"] == "completed" and status["processed"] == 2
+    assert [r["success"] for r in page["results"]] == [True, False]
+    assert len(stream.text.splitlines()) == 2
@@ -0,0 +1,132 @@
+"""Tests for price_model.py (run from backend/: python -m pytest -q)"""
+
+import math
+import os
+import __main__
+import numpy as np
+import pytest
+import export_price_model
+from export_price_model import check_parity
+from price_model import (
+    PortablePriceModel, build_feature_matrix, generate_corpus, out_of_range_features, prepare_model_input,
+    score_properties
+)
+
+BASE = {
+    "property_type": "SFH", "lot_area": 5000, "bedrooms": 3, "bathrooms": 2, "year_built": 2000,
+    "has_pool": True, "has_garage": False, "school_rating": 8
+}
+
+
+class LinearModel:
+    def predict(self, d):
+        area = d["lot_area"] * 20 if d["property_type"] == "SFH" else d["building_area"] * 300
+        return 50000 + area + 15000 * d["bedrooms"] + 10000 * d["bathrooms"] + 800 * (d["year_built"] - 1900) \
+            + (25000 if d["has_pool"] else 0) + (10000 if d["has_garage"] else 0) + 12000 * d["school_rating"]
+
+
+class StepModel(LinearModel):
+    """Non-smooth stand-in: odd bedroom counts jump by 200k, which no low-degree polynomial can follow"""
+
+    def predict(self, d):
+        return super().predict(d) + 200000 * (d["bedrooms"] % 2)
+
+
+class FailingRowModel(LinearModel):
+    """Raises for one row, so the vectorized pass fails and scoring falls back per row"""
+
+    def predict(self, d):
+        if d["bedrooms"] == 5:
+            raise RuntimeError("model blew up")
+        return super().predict(d)
+
+
+def test_bad_items_get_their_own_error():
+    results = score_properties(LinearModel(), [BASE, dict(BASE, bedrooms="three"), dict(BASE, school_rating=None)])
+    assert results[0]["success"] and math.isfinite(results[0]["predicted_price"])
+    assert not results[1]["success"] and "bedrooms" in results[1]["error"]
+    assert not results[2]["success"] and "school_rating" in results[2]["error"]
+
+
+def test_batch_matches_single_for_float_inputs():
+    prop = dict(BASE, lot_area=5000.7, year_built=2000.9)
+    expected = LinearModel().predict(prepare_model_input(prop))
+    result = score_properties(LinearModel(), [prop])[0]
+    assert result["predicted_price"] == pytest.approx(expected)
+    assert result["input_data"]["lot_area"] == 5000.7
+
+
+def test_model_failure_on_one_row_keeps_the_others():
+    results = score_properties(FailingRowModel(), [BASE, dict(BASE, bedrooms=5), dict(BASE, bedrooms=4)])
+    assert [r["success"] for r in results] == [True, False, True]
+    assert "model blew up" in results[1]["error"]
+
+
+def test_non_finite_prediction_is_an_item_error():
+    class NanModel:
+        def predict(self, d):
+            return float("nan")
+
+    result = score_properties(NanModel(), [BASE])[0]
+    assert not result["success"] and "non-finite" in result["error"]
+
+
+def fit_portable(reference, n=500, seed=0):
+    corpus = generate_corpus(n, seed=seed)
+    prices = np.array([reference.predict(row) for row in corpus], dtype=np.float64)
+    return PortablePriceModel.fit(build_feature_matrix(corpus), prices, degree=2)
+
+
+def test_portable_round_trip_keeps_parity(tmp_path):
+    manifest = str(tmp_path / "model.json")
+    fit_portable(LinearModel()).save(manifest)
+    loaded = PortablePriceModel.load(manifest)
+
+    assert isinstance(loaded.weights, np.memmap)
+    parity = check_parity(LinearModel(), loaded, generate_corpus(200, seed=1))
+    assert parity["max_rel_error"] < 1e-6
+    assert parity["batch_matches_single"]
+
+
+def test_inputs_outside_fitted_range_are_clipped_and_flagged(tmp_path):
+    manifest = str(tmp_path / "model.json")
+    fit_portable(LinearModel()).save(manifest)
+    loaded = PortablePriceModel.load(manifest)
+
+    inside = build_feature_matrix([prepare_model_input(dict(BASE, bedrooms=6))])
+    outside = build_feature_matrix([prepare_model_input(dict(BASE, bedrooms=60))])
+    assert out_of_range_features(loaded, inside) == []
+    assert out_of_range_features(loaded, outside) == ["bedrooms"]
+    assert loaded.predict_batch(outside)[0] == pytest.approx(loaded.predict_batch(inside)[0])
+    assert out_of_range_features(LinearModel(), outside) == []
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """Expose a stand-in as __main__.ComplexTrapModelRenamed so the real pickle loads"""
+    def use(cls):
+        monkeypatch.setattr(__main__, "ComplexTrapModelRenamed", cls, raising=False)
+    return use
+
+
+def run_exporter(out):
+    return export_price_model.main([
+        "--out", str(out), "--samples", "500", "--parity-samples", "200"
+    ])
+
+
+def test_exporter_writes_model_that_matches_linear_reference(tmp_path, stand_in):
+    stand_in(type("ComplexTrapModelRenamed", (LinearModel,), {}))
+    out = tmp_path / "model.json"
+
+    assert run_exporter(out) == 0
+    assert out.exists() and (tmp_path / "model.npy").exists()
+    assert export_price_model.main(["--verify", str(out), "--parity-samples", "200"]) == 0
+
+
+def test_exporter_refuses_to_write_when_parity_fails(tmp_path, stand_in):
+    stand_in(type("ComplexTrapModelRenamed", (StepModel,), {}))
+    out = tmp_path / "model.json"
+
+    assert run_exporter(out) == 1
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,104 @@
+"""Tests for priority_scheduler.py (run from backend/: python -m pytest -q)"""
+
+import threading
+import time
+import pytest
+from priority_scheduler import BULK, INTERACTIVE, PriorityScheduler
+
+NEVER_OVERDUE_MS = 1e6
+
+
+def pick_order(scheduler, blocker_class, queued, wait_before_release=0.0):
+    """
+    Occupy the single worker, queue (class, label) tasks behind it, then release it.
+    Returns labels in the order the worker ran them.
+    """
+    release, started, order = threading.Event(), threading.Event(), []
+
+    def block():
+        started.set()
+        release.wait()
+
+    scheduler.submit(blocker_class, block)
+    started.wait()
+    futures = [scheduler.submit(cls, order.append, label) for cls, label in queued]
+    time.sleep(wait_before_release)
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    return order
+
+
+def test_classes_share_the_worker_by_weight():
+    scheduler = PriorityScheduler(weights={INTERACTIVE: 4, BULK: 1}, interactive_budget_ms=NEVER_OVERDUE_MS)
+    queued = [(INTERACTIVE, "i")] * 8 + [(BULK, "b")] * 2
+
+    assert pick_order(scheduler, BULK, queued) == list("iiiiibiiib")
+
+
+def test_overdue_interactive_work_goes_first():
+    queued = [(BULK, "b")] * 3 + [(INTERACTIVE, "i")]
+
+    patient = PriorityScheduler(weights={INTERACTIVE: 1, BULK: 1}, interactive_budget_ms=NEVER_OVERDUE_MS)
+    assert pick_order(patient, INTERACTIVE, queued) == list("bibb")
+
+    strict = PriorityScheduler(weights={INTERACTIVE: 1, BULK: 1}, interactive_budget_ms=10)
+    assert pick_order(strict, INTERACTIVE, queued, wait_before_release=0.03) == list("ibbb")
+
+
+def test_idle_class_does_not_bank_credit():
+    scheduler = PriorityScheduler(weights={INTERACTIVE: 4, BULK: 1}, interactive_budget_ms=NEVER_OVERDUE_MS)
+    for _ in range(10):
+        scheduler.submit(BULK, lambda: None).result(timeout=5)
+
+    queued = [(BULK, "b")] * 2 + [(INTERACTIVE, "i")] * 6
+    # Without catch-up interactive (pass 0) would run all six before bulk (pass 11)
+    assert pick_order(scheduler, BULK, queued) == list("ibiiiibi")
+
+
+def test_chunk_size_follows_measured_item_cost():
+    scheduler = PriorityScheduler(interactive_budget_ms=50)
+    assert scheduler.chunk_size(100) == 100
+
+    scheduler.item_cost = 0.01
+    assert scheduler.chunk_size(100) == 5
+    scheduler.item_cost = 1.0
+    assert scheduler.chunk_size(100) == 1
+    scheduler.item_cost = 1e-6
+    assert scheduler.chunk_size(100) == 100
+
+
+def test_run_chunked_shrinks_chunks_to_the_budget():
+    scheduler = PriorityScheduler(interactive_budget_ms=10)
+    sizes = []
+
+    def slow(chunk):
+        sizes.append(len(chunk))
+        time.sleep(0.005 * len(chunk))
+        return [x * 2 for x in chunk]
+
+    assert scheduler.run_chunked_sync(BULK, slow, list(range(30)), 20) == [x * 2 for x in range(30)]
+    assert sizes[0] == 20
+    assert all(size <= 2 for size in sizes[1:])
+    assert scheduler.item_cost == pytest.approx(0.005, rel=0.5)
+
+
+def test_stats_count_completed_work_per_class():
+    scheduler = PriorityScheduler()
+    scheduler.submit(INTERACTIVE, lambda: None).result(timeout=5)
+    scheduler.submit(BULK, lambda: None).result(timeout=5)
+    scheduler.submit(BULK, lambda: None).result(timeout=5)
+
+    classes = scheduler.snapshot()["classes"]
+    assert classes[INTERACTIVE]["completed"] == 1
+    assert classes[BULK]["completed"] == 2
+    assert classes[BULK]["queued"] == 0
+    assert classes[BULK]["max_wait_ms"] >= classes[BULK]["p50_wait_ms"] >= 0
+
+
+def test_errors_reach_the_caller_and_unknown_classes_are_rejected():
+    scheduler = PriorityScheduler()
+    with pytest.raises(ZeroDivisionError):
+        scheduler.submit(BULK, lambda: 1 / 0).result(timeout=5)
+    with pytest.raises(ValueError):
+        scheduler.submit("urgent", lambda: None)
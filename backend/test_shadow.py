@@ -0,0 +1,97 @@
+"""Tests for shadow.py and sketch.py (run from backend/: python -m pytest -q)"""
+
+import threading
+import pytest
+import shadow
+from shadow import IntentShadowStats, PriceShadowStats, ShadowEvaluator
+from sketch import QuantileSketch
+
+
+def test_sketch_reports_zeros_exactly():
+    sketch = QuantileSketch(min_value=1e-6)
+    for value in [0, 0, 0, 10, 20]:
+        sketch.add(value)
+    assert sketch.quantiles([0.0, 0.5, 1.0]) == [0.0, 0.0, pytest.approx(20, rel=0.01)]
+
+    sketch.remove(0)
+    sketch.remove(0)
+    assert sketch.quantiles([0.5])[0] == pytest.approx(10, rel=0.01)
+
+
+def test_price_stats_snapshot():
+    stats = PriceShadowStats()
+    stats.record(100000, 100000)
+    stats.record(100000, 100000)
+    stats.record(100000, 110000)
+
+    snapshot = stats.snapshot()
+    assert snapshot["compared"] == 3
+    assert snapshot["max_abs_delta"] == 10000
+    assert snapshot["mean_delta"] == pytest.approx(10000 / 3)
+    assert snapshot["abs_percent_error_percentiles"]["p50"] == 0.0
+    assert snapshot["abs_percent_error_percentiles"]["p99"] == pytest.approx(10, rel=0.01)
+
+
+def test_intent_stats_snapshot():
+    stats = IntentShadowStats()
+    for primary, candidate in [("search", "search"), ("search", "price"), ("search", "price"), ("greet", "help")]:
+        stats.record(primary, candidate)
+
+    snapshot = stats.snapshot()
+    assert snapshot["disagreement_rate"] == 0.75
+    assert snapshot["top_confusions"][0] == {"pair": "search->price", "count": 2}
+
+
+def test_sampling_and_errors(monkeypatch):
+    draws = iter([0.05, 0.5, 0.05, 0.05])
+    monkeypatch.setattr(shadow.random, "random", lambda: next(draws))
+
+    def candidate(payload):
+        if payload == "bad":
+            raise RuntimeError("candidate blew up")
+        return payload * 2
+
+    evaluator = ShadowEvaluator(candidate, PriceShadowStats(), sample_rate=0.1)
+    for payload in [1, 2, 3, "bad"]:
+        evaluator.offer(payload, 2)
+    evaluator.queue.join()
+
+    snapshot = evaluator.snapshot()
+    assert (snapshot["offered"], snapshot["sampled"], snapshot["dropped"]) == (4, 3, 0)
+    assert snapshot["compared"] == 2 and snapshot["errors"] == 1
+    assert snapshot["max_abs_delta"] == 4
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release, started = threading.Event(), threading.Event()
+
+    def candidate(payload):
+        started.set()
+        release.wait()
+        return payload
+
+    evaluator = ShadowEvaluator(candidate, PriceShadowStats(), sample_rate=1.0, max_queue=1)
+    evaluator.offer(1, 1)
+    started.wait(timeout=5)
+    evaluator.offer(2, 2)  # fills the queue while the worker is busy
+    evaluator.offer(3, 3)
+    release.set()
+    evaluator.queue.join()
+
+    snapshot = evaluator.snapshot()
+    assert (snapshot["sampled"], snapshot["dropped"], snapshot["compared"]) == (2, 1, 2)
+
+
+def test_batch_is_sampled_once():
+    evaluator = ShadowEvaluator(lambda payload: payload, PriceShadowStats(), sample_rate=1.0)
+    evaluator.offer_one_of([(n, n) for n in range(10000)])
+    evaluator.queue.join()
+
+    snapshot = evaluator.snapshot()
+    assert (snapshot["offered"], snapshot["sampled"], snapshot["compared"]) == (1, 1, 1)
+
+
+def test_disabled_evaluator_ignores_offers():
+    evaluator = ShadowEvaluator(None, PriceShadowStats())
+    evaluator.offer(1, 1)
+    assert not evaluator.enabled and evaluator.snapshot()["offered"] == 0